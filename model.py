@@ -1,12 +1,21 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+
+@dataclass(slots=True, eq=False)
 class Task:
-    def __init__(self, t_id, t_name, t_description, t_priority, t_deadline, t_duration, t_status):
-        self.t_id = t_id
-        self.t_name = t_name
-        self.t_description = t_description
-        self.t_priority = t_priority
-        self.t_deadline = t_deadline
-        self.t_duration = t_duration
-        self.t_status = t_status
-        self.t_dependencies = []
-        self.t_start_time = None
-        self.t_end_time = None
+    t_name: str
+    t_description: str
+    t_priority: int
+    t_deadline: str
+    t_duration: int
+    t_status: str
+    t_id: int | None = None  # assigned when the task is stored
+    t_deadline_dt: date | None = None
+    t_dependencies: list = field(default_factory=list)
+    t_start_time: str | None = None
+    t_end_time: str | None = None
+
+    def __post_init__(self):
+        if self.t_deadline_dt is None:
+            self.t_deadline_dt = datetime.strptime(self.t_deadline, "%Y-%m-%d").date()
@@ -1,216 +1,266 @@
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+import asyncio
+import bisect
 import re
-import spacy
-import dateparser
-import networkx as nx
+import threading
 from model import Task
-from hyperon import MeTTa
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
-nlp = spacy.load("en_core_web_sm")
-metta = MeTTa()
 
 tasks = []
+tasks_by_id = {}
+# (t_name, t_deadline) of every task, for the duplicate check on create
+task_names_by_deadline = set()
 task_counter = 1
-
-# Initialize metta knowledge base (classify_task facts)
-for word, category in [
+_done_count = 0
+# Guards task state; parsing and scheduling run off the event loop in worker threads
+_tasks_lock = threading.Lock()
+
+# Tasks kept in (deadline, priority, id) order, i.e. the dependency chain order
+_sorted_tasks = []
+
+# Serialized /graph-data payload, reset whenever tasks change
+_graph_data_cache = None
+
+WORK_START = time(9, 0)
+WORK_END = time(17, 0)
+
+# Regexes used on every request, compiled once
+_RE_TODAY = re.compile(r'\btoday\b', re.I)
+_RE_TOMORROW = re.compile(r'\btomorrow\b', re.I)
+_RE_DATE_DMY = re.compile(r'(\b\d{1,2})[-/](\d{1,2})[-/](\d{4}\b)')
+# Date, time and duration in one alternation so parse_task scans the text once.
+# A date is consumed whole, so its day digits are never read as an hour:
+# "2026-10-20 pm 1 am" yields the time "1 am", not "20 pm".
+_RE_TASK_FIELDS = re.compile(
+    r'\b(?P<date>\d{4}-\d{2}-\d{2})\b'
+    r'|(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)'
+    r'|(?P<amount>\d+)\s*(?P<unit>hr|hour|hrs|hours|minute|minutes|min|mins)',
+    re.I,
+)
+_RE_SPLIT_PREP = re.compile(r'\bon\b|\bat\b|\bfor\b|\bbefore\b|\bafter\b', re.I)
+# Dates, clock times and stopwords dropped from graph labels, in one pass
+_RE_STRIP = re.compile(r'\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)?\b|\b(?:of|for|on|at|before|after|in|the|a|an)\b', re.I)
+_RE_WS = re.compile(r'\s+')
+
+CLASSIFICATION_FACTS = [
     ("alarm", "personal"), ("appointment", "personal"), ("art", "personal"), 
     # ... (your full list here, shortened for brevity)
     ("workflow", "professional"),
-]:
-    metta.run(f"(classify_task {word} {category})")
+]
+
+# Priority per category; anything unclassified gets 3
+_PRIORITY = {"professional": 1, "personal": 2}
+
+# Word -> category lookup for classify_task, built once from the static facts
+_WORD2CAT = {word: category for word, category in CLASSIFICATION_FACTS}
 
+@lru_cache(maxsize=4096)
 def classify_task(task_name: str) -> str:
-    words = task_name.lower().split()
-    for word in words:
-        for category in ["professional", "personal"]:
-            result = metta.run(f"! (match &self (classify_task {word} {category}) (x))")
-            if result and result != [[]]:
-                return category
+    for word in task_name.lower().replace("-", " ").replace("_", " ").split():
+        category = _WORD2CAT.get(word)
+        if category:
+            return category
     return "unknown"
 
 def normalize_date_in_text(text: str) -> str:
     today = datetime.now().date()
     tomorrow = today + timedelta(days=1)
-    text = re.sub(r'\btoday\b', today.strftime('%Y-%m-%d'), text, flags=re.I)
-    text = re.sub(r'\btomorrow\b', tomorrow.strftime('%Y-%m-%d'), text, flags=re.I)
-    date_pattern = re.compile(r'(\b\d{1,2})[-/](\d{1,2})[-/](\d{4}\b)')
-    return date_pattern.sub(lambda m: f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}", text)
+    text = _RE_TODAY.sub(today.strftime('%Y-%m-%d'), text)
+    text = _RE_TOMORROW.sub(tomorrow.strftime('%Y-%m-%d'), text)
+    return _RE_DATE_DMY.sub(lambda m: f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}", text)
 
 def parse_task(text: str):
-    global task_counter
     normalized_text = normalize_date_in_text(text)
-    doc = nlp(normalized_text)
 
-    date_match = re.search(r'\b(\d{4}-\d{2}-\d{2})\b', normalized_text)
-    time_match = re.search(r'(\d{1,2}(:\d{2})?\s*(am|pm))', normalized_text, re.I)
+    date_match = time_match = duration_match = None
+    for m in _RE_TASK_FIELDS.finditer(normalized_text):
+        if m.group('date'):
+            date_match = date_match or m
+        elif m.group('meridiem'):
+            time_match = time_match or m
+        else:
+            duration_match = duration_match or m
+        if date_match and time_match and duration_match:
+            break
 
     if not date_match:
         return {"error": "missing_date", "original_text": text}
     if not time_match:
         return {"error": "missing_time", "original_text": text}
 
-    dt = dateparser.parse(f"{date_match.group(1)} {time_match.group(1)}")
-    if not dt or dt.date() < datetime.now().date():
+    hour, minute, meridiem = time_match.group('hour', 'minute', 'meridiem')
+    try:
+        dt = datetime.strptime(f"{date_match.group('date')} {hour}:{minute or '00'} {meridiem}", "%Y-%m-%d %I:%M %p")
+    except ValueError:
+        return {"error": "invalid_date", "original_text": text}
+    if dt.date() < datetime.now().date():
         return {"error": "invalid_date", "original_text": text}
 
     duration = 60
-    duration_match = re.search(r'(\d+)\s*(hr|hour|hrs|hours|minute|minutes|min|mins)', normalized_text, re.I)
     if duration_match:
-        value = int(duration_match.group(1))
-        unit = duration_match.group(2).lower()
+        value = int(duration_match.group('amount'))
+        unit = duration_match.group('unit').lower()
         duration = value * 60 if 'hour' in unit else value
 
-    task_name = re.split(r'\bon\b|\bat\b|\bfor\b|\bbefore\b|\bafter\b', normalized_text, flags=re.I)[0].strip()
-    task_type = classify_task(task_name)
-    priority = 1 if task_type == "professional" else 2 if task_type == "personal" else 3
+    task_name = _RE_SPLIT_PREP.split(normalized_text)[0].strip()
+    priority = _PRIORITY.get(classify_task(task_name), 3)
 
     return Task(
-        t_id=task_counter,
         t_name=task_name,
         t_description=text,
         t_priority=priority,
         t_deadline=dt.strftime("%Y-%m-%d"),
+        t_deadline_dt=dt.date(),
         t_duration=duration,
         t_status="pending"
     )
 
-def generate_dependencies_and_schedule():
-    dependencies = {}
-    grouped = defaultdict(list)
-
-    # Group tasks by deadline date
-    for task in tasks:
-        dt = datetime.strptime(task.t_deadline, "%Y-%m-%d")
-        grouped[dt].append(task)
-
-    sorted_deadlines = sorted(grouped.keys())
-
-    for i, deadline in enumerate(sorted_deadlines):
-        task_list = sorted(grouped[deadline], key=lambda t: (t.t_priority, t.t_id))
+def _task_key(task):
+    return (task.t_deadline_dt, task.t_priority, task.t_id)
+
+def _schedule_from(ordered, index):
+    # Tasks before `index` keep their slots and the walk resumes from the predecessor's
+    # end, unless the schedule was laid out on an earlier day; then redo it from today.
+    today = datetime.today()
+    work_end = datetime.combine(today, WORK_END)
+    if index > 0 and datetime.strptime(ordered[0].t_start_time, "%Y-%m-%d %H:%M").date() < today.date():
+        index = 0
+    if index > 0:
+        current_time = datetime.strptime(ordered[index - 1].t_end_time, "%Y-%m-%d %H:%M")
+    else:
+        current_time = datetime.combine(today, WORK_START)
+
+    for task in ordered[index:]:
+        if current_time + timedelta(minutes=task.t_duration) > work_end:
+            current_time = datetime.combine(current_time.date() + timedelta(days=1), WORK_START)
 
-        # Serial dependencies for same day
-        for x in range(len(task_list)):
-            for y in range(x + 1, len(task_list)):
-                dependencies.setdefault(task_list[y].t_id, []).append(task_list[x].t_id)
+        task.t_start_time = current_time.strftime("%Y-%m-%d %H:%M")
+        current_time += timedelta(minutes=task.t_duration)
+        task.t_end_time = current_time.strftime("%Y-%m-%d %H:%M")
 
-        # Next day tasks depend on current day tasks
-        if i + 1 < len(sorted_deadlines):
-            next_tasks = grouped[sorted_deadlines[i + 1]]
-            for src in task_list:
-                for tgt in next_tasks:
-                    dependencies.setdefault(tgt.t_id, []).append(src.t_id)
+def insert_into_schedule(task):
+    # Splice a new task into the chain next to its neighbours and reschedule from it
+    index = bisect.bisect(_sorted_tasks, _task_key(task), key=_task_key)
+    prev = _sorted_tasks[index - 1] if index > 0 else None
+    nxt = _sorted_tasks[index] if index < len(_sorted_tasks) else None
+    _sorted_tasks.insert(index, task)
 
-    for task in tasks:
-        task.t_dependencies = dependencies.get(task.t_id, [])
+    task.t_dependencies = [prev.t_id] if prev is not None else []
+    if nxt is not None:
+        nxt.t_dependencies = [task.t_id]
 
-    G = nx.DiGraph()
-    for task in tasks:
-        G.add_node(task.t_id, task=task)
-        for dep in task.t_dependencies:
-            G.add_edge(dep, task.t_id)
+    _schedule_from(_sorted_tasks, index)
 
-    try:
-        topo_order = list(nx.topological_sort(G))
-    except nx.NetworkXUnfeasible:
-        print("Cyclic dependencies detected!")
-        return
+def remove_from_schedule(task):
+    # Splice a task out of the chain and shift its successors forward
+    index = bisect.bisect_left(_sorted_tasks, _task_key(task), key=_task_key)
+    _sorted_tasks.pop(index)
 
-    work_start = datetime.combine(datetime.today(), datetime.strptime("09:00", "%H:%M").time())
-    work_end = datetime.combine(datetime.today(), datetime.strptime("17:00", "%H:%M").time())
+    if index < len(_sorted_tasks):
+        _sorted_tasks[index].t_dependencies = [_sorted_tasks[index - 1].t_id] if index > 0 else []
 
-    current_time = work_start
-    for task_id in topo_order:
-        task = G.nodes[task_id]["task"]
+    _schedule_from(_sorted_tasks, index)
 
-        if current_time + timedelta(minutes=task.t_duration) > work_end:
-            current_time = current_time.replace(hour=9, minute=0) + timedelta(days=1)
+def _invalidate_graph_data():
+    global _graph_data_cache
+    _graph_data_cache = None
 
-        task.t_start_time = current_time.strftime("%Y-%m-%d %H:%M")
-        current_time += timedelta(minutes=task.t_duration)
-        task.t_end_time = current_time.strftime("%Y-%m-%d %H:%M")
+def completed_percent():
+    return int(_done_count * 100 / len(tasks)) if tasks else 0
 
+@lru_cache(maxsize=4096)
 def clean_task_name(text: str) -> str:
-    text = text.lower().strip()
-    text = re.sub(r'\b\d{4}-\d{2}-\d{2}\b', '', text)
-    text = re.sub(r'\b\d{1,2}(:\d{2})?\s*(am|pm)?\b', '', text)
-    text = re.sub(r'\b(of|for|on|at|before|after|in|the|a|an)\b', '', text)
-    return re.sub(r'\s+', ' ', text).strip()
+    return _RE_WS.sub(' ', _RE_STRIP.sub('', text.lower())).strip()
 
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    completed = sum(1 for t in tasks if t.t_status == "done")
-    total = len(tasks)
-    percent = int((completed / total) * 100) if total else 0
-    return templates.TemplateResponse("index.html", {"request": request, "tasks": tasks, "completed_percent": percent})
+    return render_index(request)
+
+def render_index(request: Request, **extra):
+    with _tasks_lock:
+        return templates.TemplateResponse("index.html", {"request": request, "tasks": tasks, "completed_percent": completed_percent(), **extra})
+
+def add_task(new_task):
+    # Store and schedule a parsed task; False if it duplicates an existing one
+    global task_counter
+    with _tasks_lock:
+        if (new_task.t_name, new_task.t_deadline) in task_names_by_deadline:
+            return False
+
+        # Assigned under the lock so concurrent creates cannot share an id
+        new_task.t_id = task_counter
+        tasks.append(new_task)
+        tasks_by_id[new_task.t_id] = new_task
+        task_names_by_deadline.add((new_task.t_name, new_task.t_deadline))
+        task_counter += 1
+        insert_into_schedule(new_task)
+        _invalidate_graph_data()
+    return True
 
 @app.post("/create-task")
 async def create_task(request: Request, text: str = Form(...)):
-    global task_counter
-    result = parse_task(text)
+    result = await asyncio.to_thread(parse_task, text)
 
     if isinstance(result, dict) and "error" in result:
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "tasks": tasks,
-            "completed_percent": int((sum(1 for t in tasks if t.t_status == "done") / len(tasks) * 100)) if tasks else 0,
-            "missing_info": result["error"],
-            "original_text": result["original_text"]
-        })
-
-    new_task = result
-    for t in tasks:
-        if t.t_name == new_task.t_name and t.t_deadline == new_task.t_deadline:
-            return templates.TemplateResponse("index.html", {
-                "request": request,
-                "tasks": tasks,
-                "completed_percent": int((sum(1 for t in tasks if t.t_status == "done") / len(tasks) * 100)) if tasks else 0,
-                "missing_info": "duplicate_task",
-                "original_text": text
-            })
-
-    tasks.append(new_task)
-    task_counter += 1
-    generate_dependencies_and_schedule()
+        return await asyncio.to_thread(render_index, request, missing_info=result["error"], original_text=result["original_text"])
+
+    if not await asyncio.to_thread(add_task, result):
+        return await asyncio.to_thread(render_index, request, missing_info="duplicate_task", original_text=text)
+
     return RedirectResponse("/", status_code=303)
 
 
 
 @app.post("/complete-task")
 def complete_task(t_id: int = Form(...)):
-    for t in tasks:
-        if t.t_id == t_id:
+    global _done_count
+    with _tasks_lock:
+        t = tasks_by_id.get(t_id)
+        if t is not None and t.t_status != "done":
             t.t_status = "done"
+            _done_count += 1
+            _invalidate_graph_data()
     return RedirectResponse("/", status_code=303)
 
 @app.post("/delete-task")
 def delete_task(t_id: int = Form(...)):
-    global tasks
-    tasks = [t for t in tasks if t.t_id != t_id]
-    generate_dependencies_and_schedule()
+    global _done_count
+    with _tasks_lock:
+        task = tasks_by_id.pop(t_id, None)
+        if task is None:
+            return RedirectResponse("/", status_code=303)
+        if task.t_status == "done":
+            _done_count -= 1
+        remove_from_schedule(task)
+        tasks.remove(task)
+        task_names_by_deadline.discard((task.t_name, task.t_deadline))
+        _invalidate_graph_data()
     return RedirectResponse("/", status_code=303)
 
 @app.get("/graph-data")
 def graph_data():
-    elements = []
-    for t in tasks:
-        elements.append({
-            "data": {
-                "id": str(t.t_id),
-                "label": t.t_name,
-                "name": clean_task_name(t.t_name),
-                "priority": t.t_priority,
-                "status": t.t_status
-            }
-        })
-        for dep in getattr(t, 't_dependencies', []):
-            elements.append({
+    global _graph_data_cache
+    with _tasks_lock:
+        if _graph_data_cache is None:
+            nodes = [{
+                "data": {
+                    "id": str(t.t_id),
+                    "label": t.t_name,
+                    "name": clean_task_name(t.t_name),
+                    "priority": t.t_priority,
+                    "status": t.t_status
+                }
+            } for t in tasks]
+            edges = [{
                 "data": {"source": str(dep), "target": str(t.t_id)}
-            })
-    return JSONResponse({"elements": elements})
+            } for t in tasks for dep in t.t_dependencies]
+            elements = nodes + edges
+            _graph_data_cache = JSONResponse({"elements": elements}).body
+        payload = _graph_data_cache
+    return Response(content=payload, media_type="application/json")